@@ -14,6 +14,7 @@ Date:   December 23, 2024
 
 import pygame
 import sys
+import math
 import random
 
 pygame.init()
@@ -32,6 +33,38 @@ VIEW_SIZE = RADIUS * 2 + 1  # total tiles horizontally & vertically
 TILE_WIDTH  = SCREEN_WIDTH  // VIEW_SIZE
 TILE_HEIGHT = SCREEN_HEIGHT // VIEW_SIZE
 
+# Runtime zoom: view radius per zoom level (RADIUS is the default level)
+ZOOM_LEVELS = [4, 8, 16, 32, 64]
+
+# Views wider than this many tiles blit a mip surface instead of tiles.
+# Narrower views blit tiles, so their cost grows with the zoom level up to
+# (MAX_TILE_VIEW+1)**2 blits (324); only the mip path is constant.
+MAX_TILE_VIEW = 17
+
+# Mip chain of the terrain: pixels per tile at level 0, capped so the
+# level 0 surface never exceeds MIP_MAX_SIZE on its longest side.
+# The map is padded with EMPTY tiles (as draw_tiles shows off-map) wide
+# enough for the farthest zoom plus the sub-tile shift.
+MIP_BASE_TILE = 16
+MIP_MAX_SIZE  = 4096
+MIP_PAD       = ZOOM_LEVELS[-1] + 2
+
+MINIMAP_SIZE   = 150
+MINIMAP_MARGIN = 8
+
+# Scheduler rates (per second). Simulation (player moves), AI (monster
+# updates) and rendering run independently; frames are only drawn when the
+# world changed or an interpolated move is still on screen.
+SIM_RATE    = 10
+AI_RATE     = 10
+RENDER_RATE = 60
+MAX_CATCHUP_TICKS = 5
+
+# Tween monster moves between AI ticks. Off by default: monsters wander on
+# every tick, so tweening them means drawing at RENDER_RATE whenever one is
+# on screen; without it a frame is only drawn when a visible monster moved.
+INTERPOLATE_MONSTERS = False
+
 # Weighted random tiles
 #  0=mountain,1=river,2=grass,3=rock,4=riverrock
 
@@ -99,6 +132,64 @@ ROCK       = RPGTile(rock_img,      blocked=True)
 RIVERROCK  = RPGTile(riverrock_img, blocked=False)
 EMPTY      = RPGTile(empty_img,     blocked=False)
 
+# -----------------------------------------------------------------------------
+# Zoom: scaled image cache + terrain mip levels
+# -----------------------------------------------------------------------------
+_scaled_cache = {}
+
+def scaled_image(image, w, h):
+    # Each image is scaled once per zoom size, then reused every frame
+    if image.get_width()==w and image.get_height()==h:
+        return image
+    key = (id(image), w, h)
+    img = _scaled_cache.get(key)
+    if img is None:
+        img = pygame.transform.scale(image, (w, h))
+        _scaled_cache[key] = img
+    return img
+
+def render_terrain(map_data, tile_w, tile_h):
+    rows = len(map_data)
+    cols = len(map_data[0])
+    surface = pygame.Surface((cols*tile_w, rows*tile_h))
+    for r in range(rows):
+        for c in range(cols):
+            tile = RPGTile.get_tile(map_data[r][c])
+            surface.blit(scaled_image(tile.image, tile_w, tile_h), (c*tile_w, r*tile_h))
+    return surface
+
+def pad_map(map_data, pad):
+    # Any char RPGTile.get_tile() does not know is drawn as EMPTY
+    cols = len(map_data[0])
+    blank = " " * (cols + 2*pad)
+    out = [blank] * pad
+    for row in map_data:
+        out.append(" "*pad + row + " "*pad)
+    out.extend([blank] * pad)
+    return out
+
+def build_mip_levels(map_data):
+    # Level 0 is the whole (padded) map pre-rendered, each next level is
+    # half the size
+    rows = len(map_data)
+    cols = len(map_data[0])
+    base = max(1, min(MIP_BASE_TILE, MIP_MAX_SIZE // max(rows, cols)))
+    levels = [render_terrain(map_data, base, base)]
+    while True:
+        w, h = levels[-1].get_size()
+        if w <= cols or h <= rows:
+            break
+        levels.append(pygame.transform.smoothscale(levels[-1], (max(1, w//2), max(1, h//2))))
+    return levels
+
+def pick_mip_level(levels, cols, tile_w):
+    # Smallest level that still has at least tile_w pixels per tile
+    best = levels[0]
+    for level in levels:
+        if level.get_width() / cols >= tile_w:
+            best = level
+    return best
+
 # -----------------------------------------------------------------------------
 # Weighted random map creation + "center grass zone"
 # -----------------------------------------------------------------------------
@@ -222,6 +313,22 @@ class Entity:
         self.image = image
         self.type = e_type
         self.hp = 10
+        # position at the start of the current tick, for interpolation
+        self.prev_x = x
+        self.prev_y = y
+
+    def begin_tick(self):
+        moved = self.prev_x != self.x or self.prev_y != self.y
+        self.prev_x = self.x
+        self.prev_y = self.y
+        return moved
+
+    def is_moving(self):
+        return self.prev_x != self.x or self.prev_y != self.y
+
+    def lerp_pos(self, alpha):
+        return (self.prev_x + (self.x - self.prev_x)*alpha,
+                self.prev_y + (self.y - self.prev_y)*alpha)
 
 class PDEView:
 
@@ -233,31 +340,160 @@ class PDEView:
         self.rows = len(game_map)
         self.cols = len(game_map[0])
 
-        self.margin_x = (SCREEN_WIDTH  - TILE_WIDTH  * VIEW_SIZE)//2
-        self.margin_y = (SCREEN_HEIGHT - TILE_HEIGHT * VIEW_SIZE)//2
+        # Terrain mips are rendered once; far zoom and the minimap reuse them
+        self.mip_cols = self.cols + 2*MIP_PAD
+        self.mip_rows = self.rows + 2*MIP_PAD
+        self.mips = build_mip_levels(pad_map(game_map, MIP_PAD))
+        self.build_minimap()
+
+        self.set_zoom(ZOOM_LEVELS.index(RADIUS))
+
+    def set_zoom(self, level):
+        level = max(0, min(level, len(ZOOM_LEVELS)-1))
+        self.zoom      = level
+        self.radius    = ZOOM_LEVELS[level]
+        self.view_size = self.radius*2 + 1
+        self.tile_w    = max(1, SCREEN_WIDTH  // self.view_size)
+        self.tile_h    = max(1, SCREEN_HEIGHT // self.view_size)
+
+        self.margin_x = (SCREEN_WIDTH  - self.tile_w * self.view_size)//2
+        self.margin_y = (SCREEN_HEIGHT - self.tile_h * self.view_size)//2
         if self.margin_x < 0: self.margin_x=0
         if self.margin_y < 0: self.margin_y=0
 
-    def draw(self, screen):
+        # (view key, scaled mip frame) of the last far-zoom draw
+        self.mip_frame = None
+        self.dirty = True
+
+    def zoom_in(self):
+        self.set_zoom(self.zoom - 1)
+
+    def zoom_out(self):
+        self.set_zoom(self.zoom + 1)
+
+    def in_view(self, e):
+        # prev or current tile inside the view, including the extra
+        # row/column drawn for the sub-tile shift
+        x_min = self.player.x - self.radius - 1
+        y_min = self.player.y - self.radius - 1
+        x_max = self.player.x + self.radius + 1
+        y_max = self.player.y + self.radius + 1
+        return ((x_min <= e.x <= x_max and y_min <= e.y <= y_max) or
+                (x_min <= e.prev_x <= x_max and y_min <= e.prev_y <= y_max))
+
+    def is_animating(self, sim_alpha=0.0, ai_alpha=0.0):
+        # True while a visible interpolated move has not reached its tile.
+        # The player scrolls the whole view, monsters only count on screen.
+        if sim_alpha < 1.0 and self.player.is_moving():
+            return True
+        if ai_alpha >= 1.0:
+            return False
+        return any(e.is_moving() and self.in_view(e)
+                   for e in self.entities if e is not self.player)
 
-        x_min = self.player.x - RADIUS
-        y_min = self.player.y - RADIUS
+    def begin_player_tick(self):
+        if self.player.begin_tick():
+            self.dirty = True
 
-        for row in range(VIEW_SIZE):
-            for col in range(VIEW_SIZE):
+    def begin_monster_tick(self):
+        for e in self.entities:
+            if e is not self.player:
+                e.begin_tick()
+
+    def end_monster_tick(self):
+        # only moves that show up on screen need a new frame
+        if any(e.is_moving() and self.in_view(e)
+               for e in self.entities if e is not self.player):
+            self.dirty = True
+
+    def draw(self, screen, sim_alpha=1.0, ai_alpha=1.0):
+
+        # Camera follows the interpolated player position; the view is
+        # shifted by the sub-tile remainder and clipped to the view area.
+        px, py = self.player.lerp_pos(sim_alpha)
+        cam_x = px - self.radius
+        cam_y = py - self.radius
+        x_min = math.floor(cam_x)
+        y_min = math.floor(cam_y)
+        off_x = int((cam_x - x_min)*self.tile_w)
+        off_y = int((cam_y - y_min)*self.tile_h)
+
+        screen.set_clip(pygame.Rect(self.margin_x, self.margin_y,
+                                    self.tile_w*self.view_size, self.tile_h*self.view_size))
+
+        if self.view_size > MAX_TILE_VIEW:
+            self.draw_mip(screen, x_min, y_min, off_x, off_y)
+        else:
+            self.draw_tiles(screen, x_min, y_min, off_x, off_y)
+
+        for ent in self.entities:
+            ex, ey = ent.lerp_pos(sim_alpha if ent is self.player else ai_alpha)
+            if cam_x-1 < ex < cam_x+self.view_size and cam_y-1 < ey < cam_y+self.view_size:
+                dx = self.margin_x + int((ex - cam_x)*self.tile_w)
+                dy = self.margin_y + int((ey - cam_y)*self.tile_h)
+                screen.blit(scaled_image(ent.image, self.tile_w, self.tile_h), (dx, dy))
+
+        screen.set_clip(None)
+        self.draw_minimap(screen, cam_x, cam_y)
+        # a frame drawn mid-move keeps the view dirty, so the frame at
+        # alpha 1.0 (entity exactly on its tile) is always drawn too
+        self.dirty = self.is_animating(sim_alpha, ai_alpha)
+
+    def draw_tiles(self, screen, x_min, y_min, off_x=0, off_y=0):
+        # one extra row/column covers the sub-tile shift
+        for row in range(self.view_size+1):
+            for col in range(self.view_size+1):
                 mx = x_min + col
                 my = y_min + row
                 tile = self.get_tile_at(mx, my)
-                dx = self.margin_x + col*TILE_WIDTH
-                dy = self.margin_y + row*TILE_HEIGHT
-                screen.blit(tile.image, (dx, dy))
-
-
-        for ent in self.entities:
-            if x_min <= ent.x < x_min+VIEW_SIZE and y_min <= ent.y < y_min+VIEW_SIZE:
-                dx = self.margin_x + (ent.x - x_min)*TILE_WIDTH
-                dy = self.margin_y + (ent.y - y_min)*TILE_HEIGHT
-                screen.blit(ent.image, (dx, dy))
+                dx = self.margin_x + col*self.tile_w - off_x
+                dy = self.margin_y + row*self.tile_h - off_y
+                screen.blit(scaled_image(tile.image, self.tile_w, self.tile_h), (dx, dy))
+
+    def draw_mip(self, screen, x_min, y_min, off_x=0, off_y=0):
+        # Far zoom: one scaled cut of a mip level instead of per-tile blits.
+        # The mips are padded with EMPTY, so off-map looks as in draw_tiles.
+        key = (self.zoom, x_min, y_min)
+        if self.mip_frame is None or self.mip_frame[0] != key:
+            n = self.view_size + 1
+            c0 = x_min + MIP_PAD
+            r0 = y_min + MIP_PAD
+            level = pick_mip_level(self.mips, self.mip_cols, self.tile_w)
+            sx = level.get_width()  / self.mip_cols
+            sy = level.get_height() / self.mip_rows
+            src = pygame.Rect(int(c0*sx), int(r0*sy), max(1, int(n*sx)), max(1, int(n*sy)))
+            src = src.clip(level.get_rect())
+            img = pygame.transform.scale(level.subsurface(src), (n*self.tile_w, n*self.tile_h))
+            self.mip_frame = (key, img)
+        screen.blit(self.mip_frame[1], (self.margin_x - off_x, self.margin_y - off_y))
+
+    def build_minimap(self):
+        scale = MINIMAP_SIZE / max(self.rows, self.cols)
+        self.minimap_scale = scale
+        size = (max(1, int(self.cols*scale)), max(1, int(self.rows*scale)))
+        level = pick_mip_level(self.mips, self.mip_cols, scale)
+        s = level.get_width() / self.mip_cols
+        inner = pygame.Rect(int(MIP_PAD*s), int(MIP_PAD*s),
+                            max(1, int(self.cols*s)), max(1, int(self.rows*s)))
+        inner = inner.clip(level.get_rect())
+        self.minimap = pygame.transform.smoothscale(level.subsurface(inner), size)
+        self.minimap_pos = (SCREEN_WIDTH - size[0] - MINIMAP_MARGIN, MINIMAP_MARGIN)
+
+    def draw_minimap(self, screen, x_min, y_min):
+        mx, my = self.minimap_pos
+        scale = self.minimap_scale
+        screen.blit(self.minimap, (mx, my))
+        pygame.draw.rect(screen, (255,255,255), self.minimap.get_rect(topleft=(mx, my)), 1)
+
+        view = pygame.Rect(mx + int(x_min*scale), my + int(y_min*scale),
+                           max(2, int(self.view_size*scale)), max(2, int(self.view_size*scale)))
+        view = view.clip(self.minimap.get_rect(topleft=(mx, my)))
+        if view.width and view.height:
+            pygame.draw.rect(screen, (255,255,0), view, 1)
+
+        px = mx + int((self.player.x + 0.5)*scale)
+        py = my + int((self.player.y + 0.5)*scale)
+        pygame.draw.circle(screen, (255,0,0), (px, py), max(2, int(scale/2)))
 
     def get_tile_at(self, x, y):
         if x<0 or x>=self.cols or y<0 or y>=self.rows:
@@ -311,7 +547,10 @@ class PDEView:
                         print("Dragon attacks Slime!")
 
         # remove dead
-        self.entities = [e for e in self.entities if e.hp>0]
+        alive = [e for e in self.entities if e.hp>0]
+        if len(alive) != len(self.entities):
+            self.dirty = True
+        self.entities = alive
 
     def update_slime(self, slime):
         # see if dragon is near
@@ -351,6 +590,63 @@ class PDEView:
             e.x=nx
             e.y=ny
 
+class RateTimer:
+    """Fixed-rate ticks on the pygame clock (milliseconds)."""
+
+    def __init__(self, rate):
+        self.step = 1000.0 / rate
+        self.next_time = pygame.time.get_ticks() + self.step
+
+    def due(self, now):
+        # number of ticks to run now; drops backlog beyond MAX_CATCHUP_TICKS
+        n = 0
+        while now >= self.next_time and n < MAX_CATCHUP_TICKS:
+            self.next_time += self.step
+            n += 1
+        if now >= self.next_time:
+            self.next_time = now + self.step
+        return n
+
+    def reset(self, now):
+        # restart the cadence with a tick due right away
+        self.next_time = now
+
+    def ready(self, now):
+        # single-shot variant for rendering: never catches up
+        if now < self.next_time:
+            return False
+        self.next_time = now + self.step
+        return True
+
+    def alpha(self, now):
+        # progress through the current tick, 0..1
+        a = 1.0 - (self.next_time - now) / self.step
+        return max(0.0, min(a, 1.0))
+
+
+class GameScheduler:
+
+    def __init__(self, sim_rate=SIM_RATE, ai_rate=AI_RATE, render_rate=RENDER_RATE):
+        self.sim    = RateTimer(sim_rate)
+        self.ai     = RateTimer(ai_rate)
+        self.render = RateTimer(render_rate)
+
+    def wait_ms(self, now, needs_render, sim_active):
+        # how long the loop may sleep in pygame.event.wait(); an idle sim
+        # (no arrow key down) is woken by its KEYDOWN event instead
+        deadline = self.ai.next_time
+        if sim_active:
+            deadline = min(deadline, self.sim.next_time)
+        if needs_render:
+            deadline = min(deadline, self.render.next_time)
+        # round up so the loop does not wake just before the deadline;
+        # event.wait(0) would block forever
+        return max(1, math.ceil(deadline - now))
+
+def ai_alpha(scheduler, now):
+    # 1.0 draws monsters on their current tile (no tween)
+    return scheduler.ai.alpha(now) if INTERPOLATE_MONSTERS else 1.0
+
 def main():
     # 1) EA-generate a map
     final_map = generate_map_ea(MAP_ROWS, MAP_COLS)
@@ -399,39 +695,84 @@ def main():
 
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("PDE-Style EA RPG (More Grass, Less Empty)")
-    clock = pygame.time.Clock()
+
+    scheduler = GameScheduler()
+    move_keys = {pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0),
+                 pygame.K_UP: (0, -1),   pygame.K_DOWN: (0, 1)}
+    # arrow presses since the last sim tick, so short taps are not lost
+    pressed = set()
+    # sim ticks only run while an arrow key is down or a press is pending
+    sim_active = False
 
     running = True
     while running:
-        clock.tick(10)  # ~10 FPS
-
-        for event in pygame.event.get():
+        # Sleep until input arrives or the next tick/frame is due
+        now = pygame.time.get_ticks()
+        needs_render = view.dirty or view.is_animating(scheduler.sim.alpha(now),
+                                                       ai_alpha(scheduler, now))
+        event = pygame.event.wait(scheduler.wait_ms(now, needs_render, sim_active))
+        events = pygame.event.get()
+        if event.type != pygame.NOEVENT:
+            events.insert(0, event)
+
+        for event in events:
             if event.type == pygame.QUIT:
                 running=False
-
-        # Player movement
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]:
-            view.move_player(-1, 0)
-        if keys[pygame.K_RIGHT]:
-            view.move_player(1, 0)
-        if keys[pygame.K_UP]:
-            view.move_player(0, -1)
-        if keys[pygame.K_DOWN]:
-            view.move_player(0, 1)
-
-        # Update monsters
-        view.update_monsters()
+            elif event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                    view.zoom_in()
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    view.zoom_out()
+                elif event.key in move_keys:
+                    pressed.add(event.key)
+                    if not sim_active:
+                        scheduler.sim.reset(pygame.time.get_ticks())
+                        sim_active = True
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                view.dirty = True
+
+        now = pygame.time.get_ticks()
+
+        # Simulation: player movement. prev positions are recorded once per
+        # batch, so a catch-up after a stall interpolates from where the
+        # entity was last drawn rather than jumping to an intermediate tile.
+        if sim_active:
+            ticks = scheduler.sim.due(now)
+            if ticks:
+                view.begin_player_tick()
+            for _ in range(ticks):
+                keys = pygame.key.get_pressed()
+                if not pressed and not any(keys[key] for key in move_keys):
+                    # no arrow key: stop sim ticks until the next KEYDOWN; the
+                    # last move keeps interpolating to alpha 1.0
+                    sim_active = False
+                    break
+                for key, (dx, dy) in move_keys.items():
+                    if keys[key] or key in pressed:
+                        view.move_player(dx, dy)
+                pressed.clear()
+
+        # AI: monster updates
+        ticks = scheduler.ai.due(now)
+        if ticks:
+            view.begin_monster_tick()
+        for _ in range(ticks):
+            view.update_monsters()
+        if ticks:
+            view.end_monster_tick()
 
         # Check if player died
         if player.hp <=0:
             print("Game Over! Player died.")
             running=False
 
-        # Draw
-        screen.fill((0,0,0))
-        view.draw(screen)
-        pygame.display.flip()
+        # Draw only when something changed on screen
+        sim_alpha = scheduler.sim.alpha(now)
+        monster_alpha = ai_alpha(scheduler, now)
+        if (view.dirty or view.is_animating(sim_alpha, monster_alpha)) and scheduler.render.ready(now):
+            screen.fill((0,0,0))
+            view.draw(screen, sim_alpha, monster_alpha)
+            pygame.display.flip()
 
     pygame.quit()
     sys.exit()
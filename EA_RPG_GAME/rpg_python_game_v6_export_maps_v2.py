@@ -7,6 +7,9 @@ Date:   Dec 23, 2024
 import pygame
 import sys
 import random
+import multiprocessing
+
+from shared_map_store import SharedMapStore
 
 pygame.init()
 
@@ -29,6 +32,9 @@ TILE_HEIGHT = 32
 NUM_SLIMES  = 4
 NUM_DRAGONS = 2
 
+NUM_MAPS    = 10
+NUM_WORKERS = 4
+
 
 mountain_img  = pygame.image.load("mountain.png")
 river_img     = pygame.image.load("river.png")
@@ -79,6 +85,10 @@ ROCK       = RPGTile(rock_img,      blocked=True)
 RIVERROCK  = RPGTile(riverrock_img, blocked=False)
 EMPTY      = RPGTile(empty_img,     blocked=False)
 
+# Tile rules for the shared map store, taken from the RPGTile table above
+BLOCKED_TILES = [ch for ch in WEIGHTED_TILES[0] if RPGTile.get_tile(ch).blocked]
+WATER_TILES   = [ch for ch in WEIGHTED_TILES[0] if RPGTile.get_tile(ch) in (RIVER, RIVERROCK)]
+
 def random_weighted_map(rows, cols):
     tiles, weights = WEIGHTED_TILES
     data = []
@@ -181,27 +191,20 @@ def generate_map_ea(rows, cols):
     return final_map
 
 
-def place_slimes_and_dragons(map_data):
+def place_slimes_and_dragons(store):
 
-    rows = len(map_data)
-    cols = len(map_data[0])
+    rows = store.rows
+    cols = store.cols
 
 
     monster_positions = []
 
-    # Helper: check blocked
-    def is_blocked(r, c):
-        if r<0 or r>=rows or c<0 or c>=cols:
-            return True
-        tile = RPGTile.get_tile(map_data[r][c])
-        return tile.blocked
-
-    # place slimes
+    # place slimes (blocked mask is read straight from shared memory)
     slimes_placed = 0
     while slimes_placed < NUM_SLIMES:
         r = random.randint(0, rows-1)
         c = random.randint(0, cols-1)
-        if not is_blocked(r,c):
+        if not store.is_blocked(c, r):
             monster_positions.append((c, r, slime_img))  # x=c, y=r
             slimes_placed +=1
 
@@ -210,17 +213,17 @@ def place_slimes_and_dragons(map_data):
     while dragons_placed < NUM_DRAGONS:
         r = random.randint(0, rows-1)
         c = random.randint(0, cols-1)
-        if not is_blocked(r,c):
+        if not store.is_blocked(c, r):
             monster_positions.append((c, r, dragon_img))
             dragons_placed +=1
 
     return monster_positions
 
 
-def render_map_with_monsters(map_data, monsters):
+def render_map_with_monsters(store, monsters):
 
-    rows = len(map_data)
-    cols = len(map_data[0])
+    rows = store.rows
+    cols = store.cols
     surf_width  = cols * TILE_WIDTH
     surf_height = rows * TILE_HEIGHT
 
@@ -229,7 +232,7 @@ def render_map_with_monsters(map_data, monsters):
     # Draw terrain
     for r in range(rows):
         for c in range(cols):
-            ch = map_data[r][c]
+            ch = store.tile_at(c, r)
             tile = RPGTile.get_tile(ch)
             x_draw = c*TILE_WIDTH
             y_draw = r*TILE_HEIGHT
@@ -244,23 +247,49 @@ def render_map_with_monsters(map_data, monsters):
     return surface
 
 
-def main():
-    for i in range(10):
-        print(f"\n=== Generating map #{i} ===")
-        final_map = generate_map_ea(MAP_ROWS, MAP_COLS)
+def export_landscape(job):
+    # Worker: attach to the shared map by name instead of unpickling it
+    store_name, i = job
+    store = SharedMapStore.attach(store_name)
+    try:
+        store.sync()
 
         # Place monsters (slimes & dragons) on walkable tiles
-        monsters = place_slimes_and_dragons(final_map)
+        monsters = place_slimes_and_dragons(store)
 
         # Render
-        surf = render_map_with_monsters(final_map, monsters)
+        surf = render_map_with_monsters(store, monsters)
+    finally:
+        store.close()
 
-        # Save
-        filename = f"landscape_{i}.png"
-        pygame.image.save(surf, filename)
-        print(f"Saved: {filename}")
+    # Save
+    filename = f"landscape_{i}.png"
+    pygame.image.save(surf, filename)
+    return filename
 
-    print("All done! 10 landscapes generated and saved as PNGs (with monsters).")
+
+def main():
+    stores = []
+    try:
+        for i in range(NUM_MAPS):
+            print(f"\n=== Generating map #{i} ===")
+            final_map = generate_map_ea(MAP_ROWS, MAP_COLS)
+            stores.append(SharedMapStore.create(final_map, BLOCKED_TILES, WATER_TILES))
+
+        jobs = [(store.name, i) for i, store in enumerate(stores)]
+        # spawn: forked workers would inherit pygame/SDL state from this process
+        pool = multiprocessing.get_context("spawn").Pool(NUM_WORKERS)
+        try:
+            for filename in pool.imap(export_landscape, jobs):
+                print(f"Saved: {filename}")
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        for store in stores:
+            store.close()
+
+    print(f"All done! {NUM_MAPS} landscapes generated and saved as PNGs (with monsters).")
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,266 @@
+"""
+Shared-memory map store for worker processes.
+
+The map is normally a list of strings, which has to be pickled to every
+worker (exporters, AI workers, evaluation pools).  SharedMapStore writes the
+terrain grid and its derived masks (blocked, water) once into a
+multiprocessing.shared_memory block; workers attach by name and read it in
+place without copying.
+
+Layout of the block:
+    header   : version, rows, cols  (3 x uint64)
+    rules    : 256-byte blocked table + 256-byte water table, indexed by
+               tile char, so every attached process uses the same rules
+    terrain  : rows*cols bytes, one tile char per cell
+    blocked  : rows*cols bytes, 1 if the tile is blocked
+    water    : rows*cols bytes, 1 if the tile is water
+
+The blocked/water rules are passed in by the creator (the game and the
+exporter derive them from their RPGTile table), so they are never copied
+by hand into this module.
+
+The version counter works like a seqlock: the owner makes it odd while it is
+writing and even again when done, so readers can detect both an edit in
+progress and an edit they have not seen yet.
+
+Run this file directly for a create -> attach in a worker -> edit -> detect
+round trip.
+
+Author: Woody
+Date:   Oct 19, 2026
+"""
+
+import struct
+import time
+from multiprocessing import shared_memory
+
+HEADER_FMT  = "<QQQ"
+HEADER_SIZE = struct.calcsize(HEADER_FMT)
+RULES_SIZE  = 2 * 256
+
+# How long readers wait for a write in progress before giving up (seconds)
+SYNC_TIMEOUT = 1.0
+
+
+def _rule_table(tile_chars):
+    # 256-byte bytes.translate() table: 1 for each char in tile_chars
+    table = bytearray(256)
+    for ch in tile_chars:
+        if not isinstance(ch, str) or len(ch) != 1 or ord(ch) >= 128:
+            raise ValueError(f"tile {ch!r} is not a single ASCII char")
+        table[ord(ch)] = 1
+    return bytes(table)
+
+def _encode_map(map_data, rows, cols):
+    # Whole map as one ASCII byte string, checked before anything is written
+    if len(map_data) != rows:
+        raise ValueError("map size does not match the shared store")
+    for row in map_data:
+        if len(row) != cols:
+            raise ValueError("map size does not match the shared store")
+    try:
+        return "".join(map_data).encode("ascii")
+    except UnicodeEncodeError:
+        raise ValueError("map contains non-ASCII tiles") from None
+
+
+class SharedMapStore:
+
+    def __init__(self, shm, owner):
+        self.shm   = shm
+        self.owner = owner
+        _, self.rows, self.cols = struct.unpack_from(HEADER_FMT, shm.buf, 0)
+        self.size  = self.rows * self.cols
+
+        self.rules_off   = HEADER_SIZE
+        self.terrain_off = self.rules_off + RULES_SIZE
+        self.blocked_off = self.terrain_off + self.size
+        self.water_off   = self.blocked_off + self.size
+
+        rules = bytes(shm.buf[self.rules_off:self.terrain_off])
+        self.blocked_table = rules[:256]
+        self.water_table   = rules[256:]
+
+        self.seen_version = self.version
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # -------------------------------------------------------------------------
+    # Create (owner) / attach (workers)
+    # -------------------------------------------------------------------------
+    @classmethod
+    def create(cls, map_data, blocked_tiles, water_tiles, name=None):
+        rows = len(map_data)
+        cols = len(map_data[0]) if rows else 0
+        terrain = _encode_map(map_data, rows, cols)
+        rules = _rule_table(blocked_tiles) + _rule_table(water_tiles)
+
+        shm = shared_memory.SharedMemory(name=name, create=True,
+                                         size=HEADER_SIZE + RULES_SIZE + 3*rows*cols)
+        struct.pack_into(HEADER_FMT, shm.buf, 0, 0, rows, cols)
+        shm.buf[HEADER_SIZE:HEADER_SIZE + RULES_SIZE] = rules
+        store = cls(shm, owner=True)
+        store._write_regions(terrain)
+        return store
+
+    @classmethod
+    def attach(cls, name):
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, owner=False)
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------------------------------------------------------
+    # Versioning
+    # -------------------------------------------------------------------------
+    @property
+    def version(self):
+        return struct.unpack_from("<Q", self.shm.buf, 0)[0]
+
+    def _set_version(self, v):
+        struct.pack_into("<Q", self.shm.buf, 0, v)
+
+    def changed(self):
+        # True if the map was edited since this handle last synced
+        return self.version != self.seen_version
+
+    def sync(self, timeout=SYNC_TIMEOUT):
+        # Wait for any write in progress, then mark the current version seen
+        deadline = time.monotonic() + timeout
+        v = self.version
+        while v % 2 == 1:
+            if time.monotonic() >= deadline:
+                raise TimeoutError("shared map is still being written")
+            time.sleep(0.001)
+            v = self.version
+        self.seen_version = v
+        return v
+
+    # -------------------------------------------------------------------------
+    # Writes (owner side). Input is validated before the version goes odd,
+    # and the version is always made even again, even if the write fails.
+    # -------------------------------------------------------------------------
+    def write_map(self, map_data):
+        self._write_regions(_encode_map(map_data, self.rows, self.cols))
+
+    def set_tile(self, x, y, ch):
+        if not (0 <= x < self.cols and 0 <= y < self.rows):
+            raise IndexError(f"tile ({x}, {y}) is outside the map")
+        if not isinstance(ch, str) or len(ch) != 1 or ord(ch) >= 128:
+            raise ValueError(f"tile {ch!r} is not a single ASCII char")
+        i = y*self.cols + x
+        b = ord(ch)
+        v = self.version
+        self._set_version(v + 1)
+        try:
+            buf = self.shm.buf
+            buf[self.terrain_off + i] = b
+            buf[self.blocked_off + i] = self.blocked_table[b]
+            buf[self.water_off   + i] = self.water_table[b]
+        finally:
+            self._set_version(v + 2)
+            self.seen_version = v + 2
+
+    def _write_regions(self, terrain):
+        # One slice write per region; masks come from the rule tables
+        blocked = terrain.translate(self.blocked_table)
+        water   = terrain.translate(self.water_table)
+        v = self.version
+        self._set_version(v + 1)
+        try:
+            buf = self.shm.buf
+            buf[self.terrain_off:self.blocked_off] = terrain
+            buf[self.blocked_off:self.water_off]   = blocked
+            buf[self.water_off:self.water_off + self.size] = water
+        finally:
+            self._set_version(v + 2)
+            self.seen_version = v + 2
+
+    # -------------------------------------------------------------------------
+    # Reads (read in place, no copy)
+    # -------------------------------------------------------------------------
+    def tile_at(self, x, y):
+        if not (0 <= x < self.cols and 0 <= y < self.rows):
+            raise IndexError(f"tile ({x}, {y}) is outside the map")
+        return chr(self.shm.buf[self.terrain_off + y*self.cols + x])
+
+    def is_blocked(self, x, y):
+        if x<0 or y<0 or x>=self.cols or y>=self.rows:
+            return True
+        return self.shm.buf[self.blocked_off + y*self.cols + x] == 1
+
+    def is_water(self, x, y):
+        if x<0 or y<0 or x>=self.cols or y>=self.rows:
+            return False
+        return self.shm.buf[self.water_off + y*self.cols + x] == 1
+
+    def to_map_data(self, timeout=SYNC_TIMEOUT):
+        # Consistent copy as the usual list-of-strings map
+        deadline = time.monotonic() + timeout
+        while True:
+            v = self.sync(max(0.0, deadline - time.monotonic()))
+            raw = bytes(self.shm.buf[self.terrain_off:self.blocked_off])
+            if self.version == v:
+                break
+        return [raw[r*self.cols:(r+1)*self.cols].decode("ascii")
+                for r in range(self.rows)]
+
+
+# -----------------------------------------------------------------------------
+# Self-check: create -> attach in a worker process -> edit -> detect
+# -----------------------------------------------------------------------------
+def _worker_read(name):
+    store = SharedMapStore.attach(name)
+    try:
+        return store.version, store.to_map_data(), store.is_blocked(0, 0), store.is_water(1, 0)
+    finally:
+        store.close()
+
+def _self_check():
+    from multiprocessing import Pool
+
+    # 0=mountain,1=river,2=grass,3=rock,4=riverrock
+    with SharedMapStore.create(["0142", "2222"], blocked_tiles="013", water_tiles="14") as store:
+        with Pool(2) as pool:
+            results = pool.map(_worker_read, [store.name]*2)
+        assert results == [(2, ["0142", "2222"], True, True)]*2, results
+
+        reader = SharedMapStore.attach(store.name)
+        try:
+            store.set_tile(0, 0, "2")
+            assert reader.changed()
+            assert reader.sync() == 4 and not reader.is_blocked(0, 0)
+
+            # Bad writes are rejected before the version changes
+            for args in [(-1, 0, "0"), (0, 2, "2"), (4, 0, "2"), (0, 0, ""), (0, 0, "é")]:
+                try:
+                    store.set_tile(*args)
+                except (IndexError, ValueError):
+                    pass
+                else:
+                    raise AssertionError(f"set_tile{args} was accepted")
+            try:
+                store.write_map(["2222", "22"])
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("ragged map was accepted")
+            assert store.version == 4 and not reader.changed()
+            assert reader.to_map_data() == ["2142", "2222"]
+        finally:
+            reader.close()
+    print("shared map store OK")
+
+if __name__ == "__main__":
+    _self_check()